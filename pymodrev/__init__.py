@@ -1,23 +1,37 @@
-from colomoto_jupyter.sessionfiles import new_output_file
-import subprocess, json
+import json
 
-from ginsim.gateway import japi
-import biolqm
+from pymodrev import snapshot
+from pymodrev.fixed_points import FixedPointEngine
+from pymodrev.scheduler import Scheduler, ModRevError, INTERACTIVE, BULK
+
+# biolqm is imported where it is used: importing it starts the JVM,
+# which is not needed to restore a ModRev from a snapshot.
+# colomoto_jupyter is imported the same way, so that the modules that do not need it
+# (snapshot, fixed_points, scheduler) can be used without the notebook stack.
+
+
+def new_output_file(ext):
+    from colomoto_jupyter.sessionfiles import new_output_file
+    return new_output_file(ext)
 
 
 def reduce_to_prime_implicants(lqm):
     # BioLQM.ModRevExport outputs the prime implicants
+    import biolqm
     exported_model_file = save(lqm)
     return biolqm.load(exported_model_file, "lp")
 
 
 def save(model, format="lp"):
+    import biolqm
     filename = new_output_file(format)
     return biolqm.save(model, filename, format)
 
 
 class ModRev:
     modrev_path = "/opt/ModRev/modrev"
+    scheduler = Scheduler()  # shared by every instance, so its limits and priorities apply to all modrev runs
+    priority = INTERACTIVE  # set to BULK on instances used in batch runs
 
     def __init__(self, lqm):
         self.dirty_flag = None
@@ -29,6 +43,57 @@ class ModRev:
         self._save_model_to_modrev_file()
         self.observations = {}
         self.repairs = {}
+        self.repairable = None  # set by stats, False when modrev finds no possible repair
+        self.missing_sections = set()  # snapshot sections not restored by from_snapshot
+
+    @classmethod
+    def from_snapshot(cls, filename, sections=None):
+        """
+        Restores a ModRev saved with save_snapshot, without loading the model through bioLQM.
+        The restored instance has no bioLQM model (lqm is None), so repaired models are
+        still loaded through bioLQM when generated.
+
+        Example:
+        :param filename: 'session.pmr'
+        :param sections: ['observations'], subset of snapshot.SECTIONS to restore.
+                         The nodes and the model are always restored. A partially restored
+                         ModRev cannot be saved with save_snapshot, since the sections it did
+                         not restore would be lost.
+        :return: ModRev
+        """
+        sections = set(snapshot.SECTIONS if sections is None else sections) | {"nodes", "model"}
+        data = snapshot.load_snapshot(filename, sections)
+
+        modrev = cls.__new__(cls)
+        modrev.lqm = None
+        modrev.prime_impl = None
+        modrev.nodes = data["nodes"]
+        modrev.modrev_file = new_output_file("lp")
+        with open(modrev.modrev_file, 'w') as file:
+            file.write(data["model"])
+        modrev.dirty_flag = False
+        modrev.observation_file = None
+        modrev.observations = data.get("observations", {})
+        modrev.repairs = data.get("repairs", {})
+        modrev.repairable = None
+        modrev.missing_sections = set(snapshot.SECTIONS) - sections
+        return modrev
+
+    def save_snapshot(self, filename):
+        """
+        Saves the model, the observations and the parsed repairs to a binary snapshot file
+        """
+        if self.missing_sections:
+            raise Exception(f"Cannot save a partially restored snapshot, missing sections: "
+                            f"{', '.join(sorted(self.missing_sections))}")
+
+        if self.dirty_flag:
+            self._save_model_to_modrev_file()
+
+        with open(self.modrev_file, 'r') as file:
+            model = file.read()
+
+        return snapshot.save_snapshot(filename, self.get_nodes(), model, self.observations, self.repairs)
 
     def print(self):
         """
@@ -38,6 +103,8 @@ class ModRev:
             print(file.read())
 
     def get_nodes(self):
+        if self.lqm is None:  # restored from a snapshot
+            return list(self.nodes)
         return [node.toString() for node in self.lqm.getComponents()]
 
     def get_observations(self):
@@ -47,6 +114,9 @@ class ModRev:
         """
         Saves the current model to a file in modrev format
         """
+        if self.lqm is None:  # restored from a snapshot, the modrev file already holds the model
+            self.dirty_flag = False
+            return
         self.modrev_file = save(self.lqm)
         self.dirty_flag = False
         # FIXME: just a reminder, in the java code of bioLQM, the model is always generating edges with value 1,
@@ -54,19 +124,10 @@ class ModRev:
 
     def _run_modrev(self, *args):
         """
-        Runs modrev with the given arguments
+        Runs modrev with the given arguments through the scheduler.
+        Raises ModRevError, with the captured stderr, if modrev does not complete.
         """
-        try:
-            result = subprocess.run(
-                [self.modrev_path] + list(args),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            return result
-        except Exception as e:
-            print(f"Error running modrev: {e}")
-            return None
+        return self.scheduler.run([self.modrev_path] + list(args), priority=self.priority)
 
     def _expand_observations_recursively(self, current_profile, current_nodes, path=[]):
         expanded_observations = {}
@@ -91,14 +152,14 @@ class ModRev:
 
         return expanded_observations
 
-    def _expand_observations(self):
+    def _expand_observations(self, observations=None):
         expanded_observations = {}
-        for profile, nodes in self.observations.items():
+        for profile, nodes in (self.observations if observations is None else observations).items():
             expanded_observations.update(self._expand_observations_recursively(profile, nodes))
         return expanded_observations
 
-    def obs_to_modrev_format(self):
-        expanded_observations = self._expand_observations()
+    def obs_to_modrev_format(self, observations=None):
+        expanded_observations = self._expand_observations(observations)
 
         observation_filename = new_output_file("lp")
 
@@ -120,21 +181,53 @@ class ModRev:
             node.setName(node.getName().lower())
             node.setNodeID(node.getNodeID().lower())
 
-    def is_consistent(self):
+    @staticmethod
+    def _state_scheme_args(state_scheme):
+        """
+        Returns the modrev arguments for the observation type and update mode of a state scheme
+        """
+        if state_scheme is None:
+            return []
+        elif state_scheme == "steady":
+            return ['-ot', 'ss']
+        elif state_scheme == "synchronous":
+            return ['-up', 's']
+        else:
+            raise Exception("Invalid state scheme")
+
+    def is_consistent(self, observation_file=None, state_scheme=None):
         """
-        Checks if the current state of the model is consistent
+        Checks if the current state of the model is consistent, under the same state schemes as stats
         """
         if self.dirty_flag:
             self._save_model_to_modrev_file()
 
-        result = self._run_modrev('-m', self.modrev_file, '-obs', self.obs_to_modrev_format(), '-v', '0', '-cc')
+        scheme_args = self._state_scheme_args(state_scheme)
+        if state_scheme == "synchronous" and not observation_file:
+            raise Exception("Time-series observations not implemented yet in python."
+                            "Pass an observation file with observation_file=...")
 
-        if not result or result.returncode != 0:
-            raise Exception(f"Error running modrev: {result}")
+        obs = observation_file if observation_file else self.obs_to_modrev_format()
+
+        result = self._run_modrev('-m', self.modrev_file, '-obs', obs, *scheme_args, '-v', '0', '-cc')
 
         output = json.loads(result.stdout)
         return output.get("consistent", False)
 
+    def screen_steady_observations(self):
+        """
+        Splits the observations into those with a completion that is a fixed point of the model,
+        and the rest, which only modrev can repair.
+
+        Example:
+        :return: ({'obs_1': {'v1': 1, 'v2': 1}}, {'obs_2': {'v1': 0, 'v2': 1}})
+                 the first dict maps each satisfiable observation to one of its fixed points
+        """
+        if self.dirty_flag:
+            self._save_model_to_modrev_file()
+
+        return FixedPointEngine(self.modrev_file).screen(self.observations)
+
     def convert_obs_to_dict(self, obs):
         """
         Converts an observation to a dictionary
@@ -203,31 +296,34 @@ class ModRev:
     def stats(self, observation_file=None, state_scheme=None):
         """
         Shows possible reparation actions in a friendly manner
+
+        With state_scheme="steady" and no observation_file, modrev is not run at all when every
+        observation already has a fixed point completion (see screen_steady_observations).
         """
         if self.dirty_flag:
             self._save_model_to_modrev_file()
 
+        if not observation_file and state_scheme == "steady":
+            # screening only skips modrev: repairs must fit every observation, screened ones included
+            _, remaining = self.screen_steady_observations()
+            if not remaining:
+                self.repairs = {}
+                self.repairable = True
+                print("This network is consistent with all observations.")
+                return
+
         obs = observation_file if observation_file else self.obs_to_modrev_format()
 
-        if state_scheme is None:
-            result = self._run_modrev('-m', self.modrev_file, '-obs', obs, '-v', '0')
-        elif state_scheme == "steady":
-            result = self._run_modrev('-m', self.modrev_file, '-obs', obs, '-ot',  'ss', '-v', '0')
-        elif state_scheme == "synchronous":
-            if obs == self.obs_to_modrev_format():
-                raise Exception("Time-series observations not implemented yet in python."
-                                "Pass an observation file with observation_file=...")
-            else:
-                result = self._run_modrev('-m', self.modrev_file, '-obs', obs, '-v', '0', '-up', 's')
-        else:
-            raise Exception("Invalid state scheme")
+        scheme_args = self._state_scheme_args(state_scheme)
+        if state_scheme == "synchronous" and not observation_file:
+            raise Exception("Time-series observations not implemented yet in python."
+                            "Pass an observation file with observation_file=...")
+
+        result = self._run_modrev('-m', self.modrev_file, '-obs', obs, *scheme_args, '-v', '0')
 
         # FIXME: this a temporary hardcode for testing purposes
         # result = self._run_modrev('-m', '/opt/ModRev/examples/model.lp', '-obs', '/opt/ModRev/examples/obsTS01.lp', '-up', 's', '-v', '0')
 
-        if not result or result.returncode != 0:
-            raise Exception(f"Error running modrev: {result}")
-
         # output of modrev comes in format:
         # change function to v1 = v2 || v3
         # v1@F1,(v2) || (v3)
@@ -236,9 +332,12 @@ class ModRev:
         inconsistent_nodes = output.split("/")  # [v2@E,v1,v2:F,(v1 && v3);E,v3,v2:F,(v1 && v3)]
 
         if "not possible" in output or "consistent" in output:
+            self.repairable = "not possible" not in output
             print(output)
             return
 
+        self.repairable = True
+
         for node in inconsistent_nodes:
             target_node, node_repairs = node.split("@")
             repair_options = node_repairs.split(";")
@@ -445,6 +544,7 @@ class ModRev:
         self.apply_repairs(converted_repairs, repair_file)  # writes these to the file
         print(f"Repairs written to {repair_file}")
 
+        import biolqm
         new_lqm = biolqm.load(repair_file)
         return ModRev(new_lqm)
 
@@ -0,0 +1,172 @@
+import argparse, contextlib, glob, json, os, sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pymodrev import ModRev, ModRevError, Scheduler, BULK
+
+
+def expand_paths(patterns):
+    """
+    Expands files, directories and glob patterns into a sorted list of files
+
+    Example:
+    :param patterns: ['models/', 'extra/*.zginml']
+    :return: ['extra/a.zginml', 'models/m1.sbml', 'models/m2.sbml']
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(os.path.join(pattern, name) for name in os.listdir(pattern)
+                         if not name.startswith(".") and os.path.isfile(os.path.join(pattern, name)))
+        elif os.path.isfile(pattern):
+            paths.add(pattern)
+        else:
+            matches = [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+            if not matches:
+                raise ValueError(f"No files match: {pattern}")
+            paths.update(matches)
+    return sorted(paths)
+
+
+def read_finished_pairs(output_file):
+    """
+    Reads the (model, observations) pairs already recorded in a previous run.
+    Pairs recorded with an error are not considered finished, so they are run again.
+    """
+    finished = set()
+    if not os.path.exists(output_file):
+        return finished
+
+    with open(output_file, 'r') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:  # line cut short by an interrupted run
+                continue
+            if "error" not in record:
+                finished.add((record["model"], record["observations"]))
+    return finished
+
+
+def run_pair(model_file, observation_file, check_only=False, state_scheme=None):
+    """
+    Checks a model against an observation file and, if inconsistent, computes its repairs
+
+    :return: {'model': ..., 'observations': ..., 'consistent': False, 'repairable': True,
+              'repairs': {'v1': [...]}}
+    """
+    import biolqm
+
+    record = {"model": model_file, "observations": observation_file}
+    try:
+        modrev = ModRev(biolqm.load(model_file))
+        modrev.priority = BULK
+        record["consistent"] = modrev.is_consistent(observation_file, state_scheme)
+        if not record["consistent"] and not check_only:
+            modrev.stats(observation_file, state_scheme)
+            record["repairable"] = modrev.repairable
+            record["repairs"] = modrev.repairs
+    except ModRevError as e:
+        record["error"] = str(e)
+        record["reason"] = e.reason
+    except Exception as e:
+        record["error"] = str(e)
+    return record
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pymodrev",
+        description="Checks the consistency of every model against every observation file "
+                    "and computes the repairs of the inconsistent pairs.")
+    parser.add_argument("-m", "--models", nargs="+", required=True,
+                        help="model files, directories or glob patterns")
+    parser.add_argument("-obs", "--observations", nargs="+", required=True,
+                        help="observation files in modrev format, directories or glob patterns")
+    parser.add_argument("-o", "--output", required=True,
+                        help="JSON Lines file the results are appended to")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of pairs run in parallel (default: number of CPUs)")
+    parser.add_argument("-ot", "--state-scheme", choices=["steady", "synchronous"], default=None,
+                        help="state scheme passed to ModRev.is_consistent and ModRev.stats")
+    parser.add_argument("-cc", "--check-only", action="store_true",
+                        help="only check consistency, do not compute repairs")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="wall-clock limit of each modrev run, in seconds")
+    parser.add_argument("--memory-limit", type=int, default=None,
+                        help="memory limit of each modrev run, in megabytes")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="run every pair, even those already recorded in the output file")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    if args.memory_limit is not None and args.memory_limit <= 0:
+        parser.error("--memory-limit must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        models = expand_paths(args.models)
+        observations = expand_paths(args.observations)
+    except ValueError as e:
+        print(f"pymodrev: {e}", file=sys.stderr)
+        return 2
+
+    finished = set() if args.no_resume else read_finished_pairs(args.output)
+    pairs = [(model, obs) for model in models for obs in observations if (model, obs) not in finished]
+    print(f"{len(pairs)} pairs to run, {len(models) * len(observations) - len(pairs)} already done",
+          file=sys.stderr)
+
+    ModRev.scheduler = Scheduler(workers=args.workers, timeout=args.timeout,
+                                 memory_limit=args.memory_limit * 1024 * 1024 if args.memory_limit else None)
+
+    failed = 0
+    written = set()
+
+    def write(future):
+        nonlocal failed
+        record = future.result()
+        if "error" in record:
+            failed += 1
+            print(f"{record['model']} x {record['observations']}: {record['error']}", file=sys.stderr)
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        written.add(future)
+
+    # modrev runs as a subprocess and bioLQM through a single JVM, so threads are enough here.
+    # ModRev reports its progress with print, so stdout is silenced for the whole run:
+    # redirecting it per thread would race on sys.stdout.
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), open(args.output, 'a') as output:
+        if output.tell() > 0:  # terminate a line cut short by an interrupted run
+            with open(args.output, 'rb') as previous:
+                previous.seek(-1, os.SEEK_END)
+                if previous.read(1) != b"\n":
+                    output.write("\n")
+
+        futures = [executor.submit(run_pair, model, obs, args.check_only, args.state_scheme)
+                   for model, obs in pairs]
+        try:
+            for future in as_completed(futures):
+                write(future)
+        except KeyboardInterrupt:
+            # drop the queued pairs and keep the results of the running ones, a later run resumes from there
+            executor.shutdown(wait=False, cancel_futures=True)
+            running = [future for future in futures if not future.cancelled() and future not in written]
+            print(f"pymodrev: interrupted, waiting for {len(running)} running pair(s)", file=sys.stderr)
+            for future in as_completed(running):
+                write(future)
+            return 130
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
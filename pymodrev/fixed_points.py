@@ -0,0 +1,185 @@
+from pymodrev.random_stuff import ModRevModel
+
+
+class FixedPointEngine:
+    """
+    Finds the fixed points of a ModRevModel that complete a partial observation.
+
+    Known values are propagated through the DNF of every node, in both directions:
+    a function whose value is decided fixes its node, and a node whose value is known
+    forces the literals left undecided in its function. Only the nodes still unknown
+    after propagation are branched on.
+
+    The sign of each regulator is taken from its edge: edge(v1,v2,0) makes v1 a
+    negative literal in the function of v2. Nodes without a function are inputs,
+    and any value of theirs is stable.
+    """
+
+    def __init__(self, model):
+        if not isinstance(model, ModRevModel):
+            model_file = model
+            model = ModRevModel()
+            model.load_from_file(model_file)
+
+        self.nodes = list(model.nodes.keys())
+        self._index = {node: i for i, node in enumerate(self.nodes)}
+
+        # functions[target] = [[(regulator, positive), ...], ...], one list per term
+        self._functions = {}
+        # watchers[node] = targets whose function must be checked again when node changes
+        self._watchers = [[] for _ in self.nodes]
+
+        for node_id, function in model.functions.items():
+            target = self._index[node_id]
+            terms = []
+            for term in function.terms:
+                literals = []
+                for regulator in term:
+                    weight = model.edges.get(regulator, {}).get(node_id)
+                    if weight is None:
+                        raise ValueError(f"No edge found for regulator {regulator} of node {node_id}")
+                    literals.append((self._index[regulator], weight != 0))
+                terms.append(literals)
+            self._functions[target] = terms
+
+        for target, terms in self._functions.items():
+            dependencies = {target} | {regulator for term in terms for regulator, _ in term}
+            for node in dependencies:
+                self._watchers[node].append(target)
+
+        # branch first on the nodes that appear in most functions
+        self._branch_order = sorted(range(len(self.nodes)), key=lambda node: -len(self._watchers[node]))
+
+    def _initial_values(self, observation):
+        values = [None] * len(self.nodes)
+        for node, value in (observation or {}).items():
+            if node not in self._index:
+                raise ValueError(f"Observation node invalid: {node}")
+            if value == '*':
+                continue
+            if str(value) not in ("0", "1"):
+                raise ValueError(f"Observation value invalid for {node}: {value!r}")
+            values[self._index[node]] = int(value)
+        return values
+
+    def _propagate(self, values, targets):
+        """
+        Propagates the known values until nothing else can be deduced.
+        Updates values in place and returns False on a conflict.
+        """
+        queue = list(targets)
+        queued = set(queue)
+
+        def assign(node, value):
+            values[node] = value
+            for watcher in self._watchers[node]:
+                if watcher not in queued:
+                    queued.add(watcher)
+                    queue.append(watcher)
+
+        while queue:
+            target = queue.pop()
+            queued.discard(target)
+
+            # open terms are neither true nor false yet, kept with their undecided literals
+            open_terms = []
+            function_value = 0
+            for term in self._functions[target]:
+                undecided = []
+                for regulator, positive in term:
+                    value = values[regulator]
+                    if value is None:
+                        undecided.append((regulator, positive))
+                    elif value != positive:
+                        break
+                else:
+                    if not undecided:
+                        function_value = 1
+                        break
+                    open_terms.append(undecided)
+            else:
+                if open_terms:
+                    function_value = None
+
+            if function_value is not None:
+                if values[target] is None:
+                    assign(target, function_value)
+                elif values[target] != function_value:
+                    return False
+                continue
+
+            if values[target] == 0:
+                # every term must be false: a term with a single undecided literal forces it false
+                for undecided in open_terms:
+                    if len(undecided) == 1:
+                        regulator, positive = undecided[0]
+                        if values[regulator] is None:
+                            assign(regulator, 0 if positive else 1)
+                        elif values[regulator] == positive:
+                            return False
+            elif values[target] == 1 and len(open_terms) == 1:
+                # the only term left open must be true
+                for regulator, positive in open_terms[0]:
+                    if values[regulator] is None:
+                        assign(regulator, 1 if positive else 0)
+                    elif values[regulator] != positive:
+                        return False
+
+        return True
+
+    def fixed_points(self, observation=None):
+        """
+        Yields every fixed point that agrees with the known values of the observation
+
+        Example:
+        :param observation: {'v1': 1, 'v2': '*', 'v3': '*'}
+        :return: generator of {'v1': 1, 'v2': 0, 'v3': 1}
+        """
+        values = self._initial_values(observation)
+        if not self._propagate(values, self._functions.keys()):
+            return
+
+        stack = [values]
+        while stack:
+            values = stack.pop()
+            node = next((node for node in self._branch_order if values[node] is None), None)
+            if node is None:
+                yield {self.nodes[i]: value for i, value in enumerate(values)}
+                continue
+
+            for value in (1, 0):  # 0 is pushed last, so it is explored first
+                branch = values.copy()
+                branch[node] = value
+                if self._propagate(branch, self._watchers[node]):
+                    stack.append(branch)
+
+    def find_fixed_point(self, observation=None):
+        """
+        Returns a fixed point that agrees with the observation, or None if there is none
+        """
+        return next(self.fixed_points(observation), None)
+
+    def is_satisfiable(self, observation):
+        """
+        Checks if some completion of the observation is a fixed point
+        """
+        return self.find_fixed_point(observation) is not None
+
+    def screen(self, observations):
+        """
+        Splits the observations into those already satisfiable by a fixed point and the rest
+
+        Example:
+        :param observations: {'obs_1': {'v1': 1, 'v2': '*'}, 'obs_2': {'v1': 0, 'v2': 1}}
+        :return: ({'obs_1': {'v1': 1, 'v2': 1}}, {'obs_2': {'v1': 0, 'v2': 1}})
+                 the first dict maps each satisfiable observation to one of its fixed points
+        """
+        fixed_points = {}
+        remaining = {}
+        for name, observation in observations.items():
+            fixed_point = self.find_fixed_point(observation)
+            if fixed_point is None:
+                remaining[name] = observation
+            else:
+                fixed_points[name] = fixed_point
+        return fixed_points, remaining
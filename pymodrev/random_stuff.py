@@ -145,7 +145,6 @@ class ModRevModel:
                 # Process functionAnd
                 for match in re.finditer(r'functionAnd\((.+?),(.*?),(.*?)\)', line):
                     node_id, term, regulator = match.groups()
-                    print(node_id, term, regulator)
                     self.update_boolean_function(node_id, int(term), regulator)
 
 
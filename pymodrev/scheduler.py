@@ -0,0 +1,289 @@
+import heapq, itertools, math, os, signal, subprocess, threading, time
+from collections import deque
+from concurrent.futures import Future
+
+try:
+    import resource
+except ImportError:  # not available on Windows, where jobs only get the wall-clock limit
+    resource = None
+
+# lower runs first
+INTERACTIVE = 0
+BULK = 10
+
+# seconds the pipes are given to close once the job's processes are killed
+_KILL_GRACE = 1.0
+_SIGXCPU = getattr(signal, "SIGXCPU", None)  # sent by RLIMIT_CPU, not available on Windows
+_OUT_OF_MEMORY_MESSAGES = ("bad_alloc", "out of memory", "cannot allocate memory", "memoryerror")
+
+
+class ModRevError(Exception):
+    """
+    A modrev run that did not complete.
+
+    reason is one of:
+        'launch'  : the executable could not be started
+        'timeout' : killed after exceeding its wall-clock or CPU time limit
+        'memory'  : ran out of memory under its memory limit
+        'exit'    : exited with a non zero return code
+    """
+
+    def __init__(self, reason, args, returncode=None, stderr="", stats=None):
+        self.reason = reason
+        self.command = args
+        self.returncode = returncode
+        self.stderr = stderr
+        self.stats = stats
+        message = f"modrev {reason} (return code {returncode}): {' '.join(args)}"
+        if stderr:
+            message += f"\n{stderr.strip()}"
+        super().__init__(message)
+
+
+class Scheduler:
+    """
+    Runs modrev commands on a pool of worker threads, in priority order.
+
+    Each job runs in its own session under a wall-clock timeout and a memory limit,
+    both optional. A timeout kills every process of the session. Linux does not
+    enforce RLIMIT_RSS, so the memory limit is set on the address space (RLIMIT_AS),
+    which bounds the resident memory too. Memory and CPU limits are applied with
+    resource.prlimit (Linux only) once the process has started, so a job runs
+    unlimited for the short time between its start and the call to prlimit.
+    The statistics of the last history_size
+    jobs are kept in stats. Their peak_rss is the VmHWM of the job's main process,
+    sampled while it runs, and None where /proc is not available.
+    """
+
+    def __init__(self, workers=None, timeout=None, memory_limit=None, history_size=1000):
+        """
+        :param workers: number of jobs run at the same time, defaults to the number of CPUs
+        :param timeout: default wall-clock limit of a job, in seconds
+        :param memory_limit: default memory limit of a job, in bytes
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.stats = deque(maxlen=history_size)
+
+        self._queue = []
+        self._sequence = itertools.count()  # keeps jobs of the same priority in submission order
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"modrev-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                _, _, job, future = heapq.heappop(self._queue)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._execute(*job))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, args, priority=BULK, timeout=None, memory_limit=None):
+        """
+        Queues a command and returns a concurrent.futures.Future of its subprocess.CompletedProcess.
+        The future raises ModRevError if the command does not complete.
+
+        Example:
+        :param args: ['/opt/ModRev/modrev', '-m', 'model.lp', '-obs', 'obs.lp', '-cc']
+        :param priority: INTERACTIVE, BULK or any integer, lower runs first
+        :param timeout: wall-clock limit in seconds, defaults to the scheduler's
+        :param memory_limit: memory limit in bytes, defaults to the scheduler's
+        """
+        timeout = self.timeout if timeout is None else timeout
+        memory_limit = self.memory_limit if memory_limit is None else memory_limit
+        job = (list(args), priority, timeout, memory_limit, time.monotonic())
+
+        future = Future()
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._sequence), job, future))
+            self._start_workers()
+            self._condition.notify()
+        return future
+
+    def run(self, args, priority=BULK, timeout=None, memory_limit=None):
+        """
+        Runs a command and waits for it, see submit
+        """
+        return self.submit(args, priority, timeout, memory_limit).result()
+
+    def summary(self):
+        """
+        Aggregates the recorded job statistics
+
+        :return: {'jobs': 12, 'queued': 3, 'failed': {'timeout': 1}, 'mean_wait': 0.4, 'mean_wall_time': 2.1,
+                  'max_peak_rss': 104857600}
+        """
+        stats = list(self.stats)
+        failed = {}
+        for job in stats:
+            if job["status"] != "ok":
+                failed[job["status"]] = failed.get(job["status"], 0) + 1
+
+        with self._condition:
+            queued = len(self._queue)
+
+        return {
+            "jobs": len(stats),
+            "queued": queued,
+            "failed": failed,
+            "mean_wait": sum(job["wait"] for job in stats) / len(stats) if stats else 0.0,
+            "mean_wall_time": sum(job["wall_time"] for job in stats) / len(stats) if stats else 0.0,
+            "max_peak_rss": max((job["peak_rss"] for job in stats if job["peak_rss"] is not None), default=None),
+        }
+
+    @staticmethod
+    def _prlimit():
+        return getattr(resource, "prlimit", None)
+
+    @classmethod
+    def _limit_resources(cls, pid, timeout, memory_limit):
+        """
+        Applies the limits to a running process. resource.prlimit is used rather than a
+        preexec_fn, which is unsafe with the threads this scheduler always runs. The price is
+        a short window after the start of the process in which it is not limited yet, and
+        processes it forks in that window are not limited either.
+        Without prlimit, only the wall-clock limit applies.
+        """
+        prlimit = cls._prlimit()
+        if prlimit is None:
+            return
+        try:
+            if memory_limit is not None:
+                prlimit(pid, resource.RLIMIT_AS, (memory_limit, memory_limit))
+            if timeout is not None:
+                # backstop in case the wall-clock kill is missed, a busy solver uses at most as much CPU.
+                # The soft limit sends SIGXCPU, which is reported as a timeout.
+                cpu_limit = math.ceil(timeout) + 1
+                prlimit(pid, resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+        except ProcessLookupError:  # already exited
+            pass
+
+    @staticmethod
+    def _peak_rss(pid):
+        """
+        Returns the resident memory high-water mark of a running process in bytes, None if unavailable.
+        Unlike ru_maxrss, VmHWM does not include the memory the parent had when it forked.
+        """
+        try:
+            with open(f"/proc/{pid}/status", 'r') as file:
+                for line in file:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    def _execute(self, args, priority, timeout, memory_limit, queued_at):
+        started_at = time.monotonic()
+        stats = {"args": args, "priority": priority, "wait": started_at - queued_at, "wall_time": 0.0,
+                 "returncode": None, "peak_rss": None, "status": "ok"}
+
+        def fail(reason, returncode=None, stderr=""):
+            stats["status"] = reason
+            self.stats.append(stats)
+            return ModRevError(reason, args, returncode, stderr, stats)
+
+        if memory_limit is not None and self._prlimit() is None:
+            raise fail("launch", stderr="memory limits need resource.prlimit, which is only available on Linux")
+
+        try:
+            # in its own session, so that a timeout kills the processes it starts too
+            process = subprocess.Popen(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                start_new_session=True
+            )
+        except OSError as e:
+            raise fail("launch", stderr=str(e))
+
+        def kill_group():
+            if not hasattr(os, "killpg"):  # no sessions on Windows
+                process.kill()
+                return
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:  # the whole group already exited
+                pass
+
+        def elapsed():
+            return time.monotonic() - started_at
+
+        try:
+            try:
+                if timeout is not None or memory_limit is not None:
+                    self._limit_resources(process.pid, timeout, memory_limit)
+            except OSError as e:
+                raise fail("launch", stderr=f"could not limit resources: {e}")
+
+            # the pipes are drained in threads while this one watches the process
+            output = {}
+
+            def read(name, pipe):
+                output[name] = pipe.read()
+                pipe.close()
+
+            readers = [threading.Thread(target=read, args=(name, pipe), daemon=True)
+                       for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))]
+            for reader in readers:
+                reader.start()
+
+            # peak RSS is sampled while the process runs: it is no longer available once it exits
+            timed_out = False
+            delay = 0.001
+            while True:
+                peak_rss = self._peak_rss(process.pid)
+                if peak_rss is not None:
+                    stats["peak_rss"] = max(stats["peak_rss"] or 0, peak_rss)
+                if process.poll() is not None:
+                    break
+                if timeout is not None and elapsed() > timeout:
+                    kill_group()  # not reaped yet, so the pid and its group still belong to this job
+                    process.wait()
+                    timed_out = True
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        except BaseException:
+            # never leave a job running behind an error
+            if process.returncode is None:
+                kill_group()
+                process.wait()
+            raise
+
+        # processes left running by the job keep the pipes open, they get what is left of the timeout
+        for reader in readers:
+            reader.join(None if timeout is None or timed_out else max(timeout - elapsed(), _KILL_GRACE))
+        if any(reader.is_alive() for reader in readers):
+            kill_group()  # the group outlives its leader while any member is alive
+            timed_out = True
+        for reader in readers:
+            reader.join(_KILL_GRACE)
+
+        stats["wall_time"] = elapsed()
+        stats["returncode"] = process.returncode
+        stdout, stderr = output.get("stdout", ""), output.get("stderr", "")
+
+        if timed_out or (_SIGXCPU is not None and process.returncode == -_SIGXCPU):
+            raise fail("timeout", process.returncode, stderr)
+        if process.returncode != 0:
+            out_of_memory = memory_limit is not None and \
+                any(message in stderr.lower() for message in _OUT_OF_MEMORY_MESSAGES)
+            raise fail("memory" if out_of_memory else "exit", process.returncode, stderr)
+
+        self.stats.append(stats)
+        return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
@@ -0,0 +1,181 @@
+import json, mmap, os, struct
+
+# Binary session snapshot of a ModRev instance.
+#
+# All integers are little-endian:
+#   header   : magic (8 bytes), version (uint16), number of sections (uint16)
+#   toc      : one entry per section: tag (4 bytes), offset (uint64), length (uint64)
+#   payloads : raw bytes of each section, aligned to 8 bytes
+#
+# Sections:
+#   NODE : node ids, utf-8, one per line
+#   MODL : model in modrev (lp) format, utf-8
+#   OBSN : observation names, utf-8, one per line
+#   OBSM : observation matrix, one uint8 per (observation, node), row-major
+#   REPR : repairs as parsed by ModRev.stats(), utf-8 json
+
+MAGIC = b"PMRSNAP\x00"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHH")
+_TOC_ENTRY = struct.Struct("<4sQQ")
+_ALIGNMENT = 8
+
+# section name -> tags it is stored in
+SECTIONS = {
+    "nodes": (b"NODE",),
+    "model": (b"MODL",),
+    "observations": (b"OBSN", b"OBSM"),
+    "repairs": (b"REPR",),
+}
+
+# observation value -> byte stored in the OBSM matrix
+_OBS_ENCODING = {"0": 0, "1": 1, "*": 2}
+_OBS_DECODING = {0: 0, 1: 1, 2: "*"}
+_OBS_MISSING = 3
+
+
+def _encode_lines(items):
+    for item in items:
+        # an empty name would be lost on decoding: an empty section decodes to no lines
+        if not item or "\n" in item:
+            raise ValueError(f"Invalid name in snapshot: {item!r}")
+    return "\n".join(items).encode("utf-8")
+
+
+def _decode_lines(data):
+    text = data.decode("utf-8")
+    return text.split("\n") if text else []
+
+
+def _encode_observations(observations, nodes):
+    node_index = {node: i for i, node in enumerate(nodes)}
+    matrix = bytearray([_OBS_MISSING]) * (len(observations) * len(nodes))
+
+    for row, (name, obs) in enumerate(observations.items()):
+        base = row * len(nodes)
+        for node, value in obs.items():
+            if node not in node_index:
+                raise ValueError(f"Observation node invalid: {node}")
+            if str(value) not in _OBS_ENCODING:
+                raise ValueError(f"Observation value invalid for {name}.{node}: {value!r}")
+            matrix[base + node_index[node]] = _OBS_ENCODING[str(value)]
+
+    return _encode_lines(list(observations.keys())), bytes(matrix)
+
+
+def _decode_observations(names, matrix, nodes):
+    n_nodes = len(nodes)
+    if len(matrix) != len(names) * n_nodes:
+        raise ValueError("Corrupted snapshot: observation matrix does not match its dimensions")
+
+    observations = {}
+    for row, name in enumerate(names):
+        values = matrix[row * n_nodes:(row + 1) * n_nodes]
+        observations[name] = {nodes[i]: _OBS_DECODING[value]
+                              for i, value in enumerate(values) if value != _OBS_MISSING}
+    return observations
+
+
+def save_snapshot(filename, nodes, model, observations=None, repairs=None):
+    """
+    Writes a snapshot file.
+
+    :param filename: path of the snapshot file
+    :param nodes: list of node ids, fixes the column order of the observation matrix
+    :param model: model in modrev (lp) format, as a string
+    :param observations: {'obs_1': {'v1': 0, 'v2': '*'}, ...}
+    :param repairs: {'v1': ['F,(v2) || (v3)', ...], ...}
+    :return: filename
+    """
+    obs_names, obs_matrix = _encode_observations(observations or {}, nodes)
+    sections = [
+        (b"NODE", _encode_lines(nodes)),
+        (b"MODL", model.encode("utf-8")),
+        (b"OBSN", obs_names),
+        (b"OBSM", obs_matrix),
+        (b"REPR", json.dumps(repairs or {}).encode("utf-8")),
+    ]
+
+    offset = _HEADER.size + _TOC_ENTRY.size * len(sections)
+    toc = []
+    for tag, payload in sections:
+        offset += -offset % _ALIGNMENT
+        toc.append((tag, offset, len(payload)))
+        offset += len(payload)
+
+    with open(filename, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(sections)))
+        for entry in toc:
+            file.write(_TOC_ENTRY.pack(*entry))
+        for (tag, offset, _), (_, payload) in zip(toc, sections):
+            file.write(b"\x00" * (offset - file.tell()))
+            file.write(payload)
+
+    return filename
+
+
+def _read_toc(buffer):
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Not a pymodrev snapshot: file too small")
+
+    magic, version, n_sections = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a pymodrev snapshot: bad magic number")
+    if version > VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}. Latest supported is {VERSION}")
+
+    toc = {}
+    for i in range(n_sections):
+        tag, offset, length = _TOC_ENTRY.unpack_from(buffer, _HEADER.size + i * _TOC_ENTRY.size)
+        if offset + length > len(buffer):
+            raise ValueError(f"Corrupted snapshot: section {tag.decode()} out of bounds")
+        toc[tag] = (offset, length)
+    return toc
+
+
+def load_snapshot(filename, sections=None):
+    """
+    Reads a snapshot file. The file is memory-mapped and only the requested sections are decoded.
+
+    Example:
+    :param filename: 'session.pmr'
+    :param sections: ['model', 'repairs'], defaults to all of SECTIONS
+    :return: {'model': 'vertex(v1)...', 'repairs': {'v1': [...]}}
+    """
+    sections = list(SECTIONS) if sections is None else list(sections)
+    for name in sections:
+        if name not in SECTIONS:
+            raise ValueError(f"Invalid snapshot section: {name}")
+
+    with open(filename, "rb") as file:
+        if os.fstat(file.fileno()).st_size < _HEADER.size:
+            raise ValueError("Not a pymodrev snapshot: file too small")
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            toc = _read_toc(buffer)
+
+            def section(tag):
+                # slicing the mmap copies only this section, and leaves no exported
+                # buffer behind that would keep the mmap from closing on an error
+                if tag not in toc:
+                    raise ValueError(f"Snapshot has no {tag.decode()} section")
+                offset, length = toc[tag]
+                return buffer[offset:offset + length]
+
+            result = {}
+            # observations are indexed by node, so the node section is always needed for them
+            nodes = _decode_lines(section(b"NODE")) \
+                if "nodes" in sections or "observations" in sections else None
+
+            if "nodes" in sections:
+                result["nodes"] = nodes
+            if "model" in sections:
+                result["model"] = section(b"MODL").decode("utf-8")
+            if "observations" in sections:
+                result["observations"] = _decode_observations(
+                    _decode_lines(section(b"OBSN")), section(b"OBSM"), nodes)
+            if "repairs" in sections:
+                result["repairs"] = json.loads(section(b"REPR").decode("utf-8"))
+
+    return result
@@ -7,4 +7,7 @@ setup(name='pymodrev',
       url="https://github.com/Lourencom/pymodrev",
       description="A Python interface to the ModRev Software Tool",
       packages=find_packages(),
+      entry_points={
+          "console_scripts": ["pymodrev=pymodrev.cli:main"],
+      },
       )
\ No newline at end of file
@@ -0,0 +1,76 @@
+import json, os, signal, threading, time
+
+import pytest
+
+from pymodrev import cli
+
+
+@pytest.fixture
+def grid(tmp_path, monkeypatch):
+    for name in ("models/a.sbml", "models/b.sbml", "observations/1.lp", "observations/2.lp"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).touch()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def read_records(filename):
+    with open(filename, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def consistent_pair(model_file, observation_file, check_only, state_scheme):
+    return {"model": model_file, "observations": observation_file, "consistent": True}
+
+
+def test_expand_paths(grid):
+    assert cli.expand_paths(["models", "observations/*.lp"]) == [
+        os.path.join("models", "a.sbml"), os.path.join("models", "b.sbml"),
+        os.path.join("observations", "1.lp"), os.path.join("observations", "2.lp"),
+    ]
+    with pytest.raises(ValueError, match="No files match"):
+        cli.expand_paths(["missing/*.lp"])
+
+
+def test_runs_every_pair(grid, monkeypatch):
+    monkeypatch.setattr(cli, "run_pair", consistent_pair)
+    assert cli.main(["-m", "models", "-obs", "observations", "-o", "out.jsonl", "-j", "2"]) == 0
+    assert len(read_records("out.jsonl")) == 4
+
+
+def test_resumes_and_retries_errors(grid, monkeypatch):
+    done = {"model": os.path.join("models", "a.sbml"), "observations": os.path.join("observations", "1.lp"),
+            "consistent": True}
+    failed = {"model": os.path.join("models", "a.sbml"), "observations": os.path.join("observations", "2.lp"),
+              "error": "modrev timeout"}
+    # the last line was cut short by an interrupted run
+    (grid / "out.jsonl").write_text(json.dumps(done) + "\n" + json.dumps(failed) + "\n" + '{"model": "mod')
+
+    ran = []
+
+    def run_pair(*args):
+        ran.append(args[:2])
+        return consistent_pair(*args)
+
+    monkeypatch.setattr(cli, "run_pair", run_pair)
+    assert cli.main(["-m", "models", "-obs", "observations", "-o", "out.jsonl"]) == 0
+    assert (done["model"], done["observations"]) not in ran
+    assert len(ran) == 3
+    with open("out.jsonl", 'r') as file:
+        lines = file.read().splitlines()
+    assert lines[2] == '{"model": "mod'  # the cut short line stays on its own line
+    assert [json.loads(line)["consistent"] for line in lines[3:]] == [True] * 3
+
+
+def test_interrupt_cancels_queued_pairs(grid, monkeypatch):
+    def slow_pair(*args):
+        time.sleep(1)
+        return consistent_pair(*args)
+
+    monkeypatch.setattr(cli, "run_pair", slow_pair)
+    threading.Timer(0.3, lambda: os.kill(os.getpid(), signal.SIGINT)).start()
+
+    started = time.monotonic()
+    assert cli.main(["-m", "models", "-obs", "observations", "-o", "out.jsonl", "-j", "1"]) == 130
+    assert time.monotonic() - started < 2
+    assert len(read_records("out.jsonl")) == 1  # the running pair is kept
@@ -0,0 +1,110 @@
+import itertools, random
+
+import pytest
+
+from pymodrev.fixed_points import FixedPointEngine
+from pymodrev.random_stuff import ModRevModel
+
+
+def build_model(nodes, functions):
+    """
+    :param nodes: ['a', 'b']
+    :param functions: {'b': [[('a', 1)]]}, one list of (regulator, sign) per term
+    """
+    model = ModRevModel()
+    for node in nodes:
+        model.add_node(node)
+    for target, terms in functions.items():
+        for term in terms:
+            for regulator, sign in term:
+                model.add_edge(regulator, target, sign)
+        model.create_boolean_function(target, len(terms))
+        for i, term in enumerate(terms):
+            for regulator, _ in term:
+                model.update_boolean_function(target, i + 1, regulator)
+    return model
+
+
+def brute_force_fixed_points(nodes, functions, observation):
+    fixed_points = []
+    for values in itertools.product((0, 1), repeat=len(nodes)):
+        state = dict(zip(nodes, values))
+        if any(value != '*' and state[node] != value for node, value in observation.items()):
+            continue
+        if all(state[target] == int(any(all(state[regulator] == sign for regulator, sign in term)
+                                        for term in terms))
+               for target, terms in functions.items()):
+            fixed_points.append(state)
+    return fixed_points
+
+
+def random_network(rng):
+    nodes = [f"v{i}" for i in range(rng.randint(1, 7))]
+    functions = {}
+    for target in nodes:
+        if rng.random() < 0.2:  # input node
+            continue
+        regulators = rng.sample(nodes, rng.randint(1, min(3, len(nodes))))
+        signs = {regulator: rng.randint(0, 1) for regulator in regulators}
+        functions[target] = [[(regulator, signs[regulator])
+                              for regulator in rng.sample(regulators, rng.randint(1, len(regulators)))]
+                             for _ in range(rng.randint(1, 3))]
+    return nodes, functions
+
+
+def state_key(nodes):
+    return lambda state: tuple(state[node] for node in nodes)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        nodes, functions = random_network(rng)
+        engine = FixedPointEngine(build_model(nodes, functions))
+        observation = {node: rng.choice([0, 1, '*', '*']) for node in nodes if rng.random() < 0.7}
+
+        expected = brute_force_fixed_points(nodes, functions, observation)
+        found = list(engine.fixed_points(observation))
+
+        assert sorted(found, key=state_key(nodes)) == sorted(expected, key=state_key(nodes))
+        assert engine.is_satisfiable(observation) == bool(expected)
+
+
+def test_screen():
+    # b = a
+    engine = FixedPointEngine(build_model(["a", "b"], {"b": [[("a", 1)]]}))
+    fixed_points, remaining = engine.screen({
+        "obs_1": {"a": 1, "b": "*"},
+        "obs_2": {"a": 1, "b": 0},
+    })
+    assert fixed_points == {"obs_1": {"a": 1, "b": 1}}
+    assert remaining == {"obs_2": {"a": 1, "b": 0}}
+
+
+def test_negative_edge():
+    # b = !a
+    engine = FixedPointEngine(build_model(["a", "b"], {"b": [[("a", 0)]]}))
+    assert engine.find_fixed_point({"a": 1}) == {"a": 1, "b": 0}
+    assert not engine.is_satisfiable({"a": 0, "b": 0})
+
+
+def test_oscillator_has_no_fixed_point():
+    # a = !b, b = a
+    engine = FixedPointEngine(build_model(["a", "b"], {"a": [[("b", 0)]], "b": [[("a", 1)]]}))
+    assert engine.find_fixed_point() is None
+
+
+def test_load_from_file(tmp_path):
+    filename = tmp_path / "model.lp"
+    filename.write_text("vertex(a).\nvertex(b).\nedge(a,b,1).\nfunctionOr(b,1).\nfunctionAnd(b,1,a).\n")
+    engine = FixedPointEngine(str(filename))
+    assert sorted(engine.fixed_points(), key=state_key(["a", "b"])) == [{"a": 0, "b": 0}, {"a": 1, "b": 1}]
+
+
+def test_invalid_observation():
+    engine = FixedPointEngine(build_model(["a"], {}))
+    with pytest.raises(ValueError, match="Observation node invalid"):
+        engine.find_fixed_point({"z": 1})
+    with pytest.raises(ValueError, match="Observation value invalid"):
+        engine.find_fixed_point({"a": 2})
@@ -0,0 +1,111 @@
+import subprocess, sys, time
+
+import pytest
+
+from pymodrev import scheduler
+from pymodrev.scheduler import Scheduler, ModRevError, INTERACTIVE, BULK
+
+needs_prlimit = pytest.mark.skipif(getattr(scheduler.resource, "prlimit", None) is None,
+                                   reason="resource.prlimit is only available on Linux")
+
+
+@pytest.fixture
+def jobs():
+    return Scheduler(workers=1)
+
+
+def test_run(jobs):
+    result = jobs.run([sys.executable, "-c", "print('consistent')"])
+    assert result.returncode == 0
+    assert result.stdout == "consistent\n"
+    assert jobs.stats[-1]["status"] == "ok"
+
+
+def test_exit_error(jobs):
+    with pytest.raises(ModRevError) as error:
+        jobs.run([sys.executable, "-c", "import sys; sys.stderr.write('grounding failed'); sys.exit(3)"])
+    assert error.value.reason == "exit"
+    assert error.value.returncode == 3
+    assert error.value.stderr == "grounding failed"
+    assert "grounding failed" in str(error.value)
+
+
+def test_launch_error(jobs):
+    with pytest.raises(ModRevError) as error:
+        jobs.run(["/nonexistent/modrev"])
+    assert error.value.reason == "launch"
+
+
+def test_timeout_kills_child_processes(jobs):
+    started = time.monotonic()
+    with pytest.raises(ModRevError) as error:
+        jobs.run(["sh", "-c", "sleep 4 & sleep 10"], timeout=0.5)
+    assert error.value.reason == "timeout"
+    assert time.monotonic() - started < 3
+
+
+@needs_prlimit
+def test_memory_limit(jobs):
+    with pytest.raises(ModRevError) as error:
+        jobs.run([sys.executable, "-c", "bytearray(512 * 1024 * 1024)"], memory_limit=128 * 1024 * 1024)
+    assert error.value.reason == "memory"
+
+
+@needs_prlimit
+def test_cpu_limit_is_a_timeout(jobs):
+    with pytest.raises(ModRevError) as error:
+        jobs.run(["sh", "-c", "kill -XCPU $$"])
+    assert error.value.reason == "timeout"
+
+
+def test_timeout_without_prlimit(jobs, monkeypatch):
+    monkeypatch.setattr(Scheduler, "_prlimit", staticmethod(lambda: None))
+    with pytest.raises(ModRevError) as error:
+        jobs.run(["sleep", "30"], timeout=0.5)
+    assert error.value.reason == "timeout"
+
+    with pytest.raises(ModRevError) as error:
+        jobs.run(["sleep", "30"], memory_limit=128 * 1024 * 1024)
+    assert error.value.reason == "launch"
+
+
+def test_limit_error_kills_the_job(jobs, monkeypatch):
+    def fail(pid, timeout, memory_limit):
+        raise PermissionError("not allowed")
+
+    started = []
+    popen = subprocess.Popen
+
+    def record_popen(*args, **kwargs):
+        process = popen(*args, **kwargs)
+        started.append(process)
+        return process
+
+    monkeypatch.setattr(Scheduler, "_limit_resources", staticmethod(fail))
+    monkeypatch.setattr(subprocess, "Popen", record_popen)
+    with pytest.raises(ModRevError) as error:
+        jobs.run(["sleep", "30"], timeout=10)
+    assert error.value.reason == "launch"
+    assert started[0].returncode is not None
+
+
+def test_interactive_jobs_run_first(jobs):
+    blocker = jobs.submit(["sleep", "0.3"])
+    order = []
+    futures = [jobs.submit(["echo", str(i)], priority=BULK) for i in range(3)]
+    futures.append(jobs.submit(["echo", "interactive"], priority=INTERACTIVE))
+    for future in futures:
+        future.add_done_callback(lambda future: order.append(future.result().stdout.strip()))
+    for future in [blocker] + futures:
+        future.result()
+    assert order == ["interactive", "0", "1", "2"]
+
+
+def test_summary(jobs):
+    jobs.run(["true"])
+    with pytest.raises(ModRevError):
+        jobs.run(["false"])
+    summary = jobs.summary()
+    assert summary["jobs"] == 2
+    assert summary["queued"] == 0
+    assert summary["failed"] == {"exit": 1}
@@ -0,0 +1,85 @@
+import struct
+
+import pytest
+
+from pymodrev import snapshot
+
+
+NODES = ["v1", "v2", "v3"]
+MODEL = "vertex(v1).\nvertex(v2).\nvertex(v3).\nedge(v1,v2,1).\nfunctionOr(v2,1).\nfunctionAnd(v2,1,v1).\n"
+OBSERVATIONS = {
+    "obs_1": {"v1": 0, "v2": 1, "v3": "*"},
+    "obs_2": {"v1": 1},  # nodes left out of an observation stay out
+}
+REPAIRS = {"v2": ["E,v1,v2", "F,(v1) || (v3)"]}
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    return snapshot.save_snapshot(str(tmp_path / "session.pmr"), NODES, MODEL, OBSERVATIONS, REPAIRS)
+
+
+def test_round_trip(snapshot_file):
+    assert snapshot.load_snapshot(snapshot_file) == {
+        "nodes": NODES,
+        "model": MODEL,
+        "observations": OBSERVATIONS,
+        "repairs": REPAIRS,
+    }
+
+
+def test_partial_load(snapshot_file):
+    assert snapshot.load_snapshot(snapshot_file, ["repairs"]) == {"repairs": REPAIRS}
+    assert snapshot.load_snapshot(snapshot_file, ["observations"]) == {"observations": OBSERVATIONS}
+
+
+def test_empty_session(tmp_path):
+    filename = snapshot.save_snapshot(str(tmp_path / "empty.pmr"), [], "")
+    assert snapshot.load_snapshot(filename) == {"nodes": [], "model": "", "observations": {}, "repairs": {}}
+
+
+def test_invalid_section(snapshot_file):
+    with pytest.raises(ValueError, match="Invalid snapshot section"):
+        snapshot.load_snapshot(snapshot_file, ["bogus"])
+
+
+@pytest.mark.parametrize("observations", [{"": {"v1": 0}}, {"obs\n1": {"v1": 0}}])
+def test_invalid_observation_name(tmp_path, observations):
+    with pytest.raises(ValueError, match="Invalid name"):
+        snapshot.save_snapshot(str(tmp_path / "session.pmr"), NODES, MODEL, observations)
+
+
+def test_invalid_observation_value(tmp_path):
+    with pytest.raises(ValueError, match="Observation value invalid"):
+        snapshot.save_snapshot(str(tmp_path / "session.pmr"), NODES, MODEL, {"obs_1": {"v1": 2}})
+
+
+@pytest.mark.parametrize("content", [b"", b"PMRSNAP", b"NOTASNAPSHOT"])
+def test_not_a_snapshot(tmp_path, content):
+    filename = tmp_path / "bad.pmr"
+    filename.write_bytes(content)
+    with pytest.raises(ValueError, match="Not a pymodrev snapshot"):
+        snapshot.load_snapshot(str(filename))
+
+
+def test_unsupported_version(snapshot_file):
+    with open(snapshot_file, "r+b") as file:
+        file.write(snapshot._HEADER.pack(snapshot.MAGIC, snapshot.VERSION + 1, 5))
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        snapshot.load_snapshot(snapshot_file)
+
+
+def test_corrupted_observation_matrix(snapshot_file):
+    # shrink the OBSM entry of the table of contents
+    with open(snapshot_file, "r+b") as file:
+        data = bytearray(file.read())
+        for i in range(struct.unpack_from("<H", data, 10)[0]):
+            position = snapshot._HEADER.size + i * snapshot._TOC_ENTRY.size
+            tag, offset, length = snapshot._TOC_ENTRY.unpack_from(data, position)
+            if tag == b"OBSM":
+                snapshot._TOC_ENTRY.pack_into(data, position, tag, offset, length - 1)
+        file.seek(0)
+        file.write(data)
+
+    with pytest.raises(ValueError, match="observation matrix does not match its dimensions"):
+        snapshot.load_snapshot(snapshot_file)